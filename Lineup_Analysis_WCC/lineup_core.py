@@ -0,0 +1,319 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import os
+import re
+import glob
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared lineup pipeline for Lineup_Merge.py and ../WCC_lineupanalysis_0602/Lineup_Merge_Upd.py.
+# Each script supplies an interval_files(team_path) callable returning (label, interval_num, path)
+# for every interval file a team may have.
+
+# ====================== CONFIGURATION ======================
+CONFERENCE_PLAYERS_CSV = 'wcc_players.csv'
+TEAM_DATA_DIR = 'teams'
+SEASON_LINEUPS_FILE = 'top_lineups.csv'
+TOP_LINEUPS_COUNT = 12
+CACHE_DIR = 'cache'  # Parsed team files, reused until a source file changes
+
+# Columns read from each lineup file (second header row) and their types
+LINEUP_DTYPES = {
+    'pId1': 'Int32', 'pId2': 'Int32', 'pId3': 'Int32', 'pId4': 'Int32', 'pId5': 'Int32',
+    'POSS': 'float64',
+    'MP*': 'float64',
+    'Plus-Minus': 'Int32',
+    'Net Rtg': 'float64',
+    'ORtg': 'float64',
+    'DRtg': 'float64'
+}
+
+PID_COLS = ['PID1', 'PID2', 'PID3', 'PID4', 'PID5']
+
+# Metric columns rounded to 2 decimals for export
+NUMERIC_OUT = ['POSS', 'MP*', 'PLUS-MINUS', 'Plus-Minus_per40', 'NET RTG', 'ORTG', 'DRTG']
+
+# Output columns (analysis column -> exported name), in file order
+OUTPUT_TOP_METRICS = {
+    'lineup': 'lineup',
+    'POSS': 'possessions',
+    'MP*': 'minutes',
+    'PLUS-MINUS': 'plusminus',
+    'Plus-Minus_per40': 'plusminus_per40',
+    'NET RTG': 'netrating',
+    'ORTG': 'offrating',
+    'DRTG': 'defrating'
+}
+OUTPUT_PROG_METRICS = {
+    'lineup': 'lineup',
+    'interval': 'interval',
+    'interval_num': 'interval_num',
+    'POSS': 'possessions',
+    'MP*': 'minutes',
+    'Plus-Minus_per40': 'plusminus_per40',
+    'NET RTG': 'netrating',
+    'PLUS-MINUS': 'plusminus'
+}
+TOP_OUT_COLS = list(OUTPUT_TOP_METRICS)
+
+# ====================== DATA LOADING ======================
+def load_player_data():
+    """Load conference player data with height information"""
+    player_df = pd.read_csv(CONFERENCE_PLAYERS_CSV)
+    player_df['height'] = pd.to_numeric(player_df['height'], errors='coerce')
+    
+    # Map playerId to {firstname[0]}{lastname[0:3]} (for example Brandi Williams -> BWil)
+    # in a single regex pass; single-word names don't match and use their first 2 letters
+    name_parts = player_df['fullName'].str.extract(r'(?s)^\s*(\S)\S*\s+(?:.*\s)?(\S{1,3})\S*\s*$')
+    initials = (name_parts[0] + name_parts[1]).str.upper()
+    initials = initials.fillna(player_df['fullName'].str[:2].str.upper())
+    player_ids = pd.to_numeric(player_df['playerId']).astype('int64')
+    
+    # Create mapping dictionaries
+    return {
+        player_id: {'initial': initial, 'height': height, 'team': team}
+        for player_id, initial, height, team in zip(
+            player_ids.tolist(), initials.tolist(),
+            player_df['height'].tolist(), player_df['teamMarket'].tolist())
+    }
+
+PLAYER_INFO = load_player_data()
+
+def build_player_lookup(player_info):
+    """Build sorted player ID, initial and sort-rank arrays for vectorized lookups"""
+    player_ids = np.array(sorted(player_info), dtype=np.int64)
+    initials_arr = np.array([player_info[pid]['initial'] for pid in player_ids], dtype=object)
+    heights_arr = np.array([player_info[pid]['height'] for pid in player_ids], dtype=np.float64)
+    
+    # Rank every player by (height, initial) once so lineups sort on a single integer
+    ranks_arr = np.empty(len(player_ids), dtype=np.int64)
+    ranks_arr[np.lexsort((initials_arr.astype(str), heights_arr))] = np.arange(len(player_ids))
+    return player_ids, initials_arr, ranks_arr
+
+# playerIds run into the millions, so index by position in the sorted ID array
+# rather than allocating arrays sized to the largest ID
+PLAYER_IDS, INITIALS_ARR, RANKS_ARR = build_player_lookup(PLAYER_INFO)
+
+def lookup_player_index(ids):
+    """Map an array of player IDs to positions in the lookup arrays (-1 if unknown)"""
+    pos = np.searchsorted(PLAYER_IDS, ids).clip(max=len(PLAYER_IDS) - 1)
+    return np.where(PLAYER_IDS[pos] == ids, pos, -1)
+
+LINEUP_CACHE = {}  # sorted player ID tuple -> lineup string
+
+# ====================== CORE FUNCTIONS ======================
+def read_lineup_csv(path):
+    """Read a lineup file, keeping only the columns used in the analysis"""
+    # Row 0 holds API field names; the display names on row 1 are the real header
+    df = pd.read_csv(path, header=1, engine='pyarrow',
+                     usecols=list(LINEUP_DTYPES), dtype=LINEUP_DTYPES)
+    # Standardize column names to uppercase
+    df.columns = df.columns.str.upper()
+    return df
+
+def load_team_data(team_dir, interval_files):
+    """Load raw season and interval data for a single team (from the parquet cache if current)"""
+    team_path = Path(TEAM_DATA_DIR) / team_dir
+    season_path = team_path / SEASON_LINEUPS_FILE
+    intervals = interval_files(team_path)
+    labels = [label for label, _, _ in intervals]
+    present = [(code, i, path) for code, (_, i, path) in enumerate(intervals) if path.exists()]
+    
+    # Source mtimes (and the read schema) are in the key, so edits invalidate the cache
+    src_mtimes = [(path.name, path.stat().st_mtime_ns)
+                  for path in [season_path, *(path for _, _, path in present)]]
+    key = hashlib.blake2b(str((src_mtimes, labels, LINEUP_DTYPES)).encode()).hexdigest()[:16]
+    season_cache = Path(CACHE_DIR) / f'{team_dir}_{key}_season.parquet'
+    interval_cache = Path(CACHE_DIR) / f'{team_dir}_{key}_intervals.parquet'
+    
+    if season_cache.exists() and (not present or interval_cache.exists()):
+        return (pd.read_parquet(season_cache),
+                pd.read_parquet(interval_cache) if present else None)
+    
+    # Load season data
+    season_df = read_lineup_csv(season_path)
+    
+    # Load intervals into one frame
+    all_intervals = []
+    for code, i, interval_path in present:
+        interval_df = read_lineup_csv(interval_path)
+        interval_df['interval_num'] = np.int8(i)
+        # Categories cover every label so they match across files and teams
+        interval_df['interval'] = pd.Categorical.from_codes(
+            np.full(len(interval_df), code), categories=labels)
+        all_intervals.append(interval_df)
+    interval_df = pd.concat(all_intervals, ignore_index=True) if all_intervals else None
+    
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    remove_stale_cache(team_dir, key)
+    write_parquet(season_df, season_cache)
+    if interval_df is not None:
+        write_parquet(interval_df, interval_cache)
+    
+    return season_df, interval_df
+
+def remove_stale_cache(team_dir, key):
+    """Delete a team's cache files (and leftover .tmp files) written under any other key"""
+    # Match the exact {team}_{16-hex key}_{kind}.parquet layout so a team whose name
+    # is a prefix of another ("San" / "San Diego") never removes the other's files.
+    # A .tmp left under the current key is simply overwritten by write_parquet
+    stale = re.compile(re.escape(team_dir) + r'_(?!' + key + r'_)[0-9a-f]{16}_(season|intervals)\.parquet(\.tmp)?')
+    for path in Path(CACHE_DIR).glob(f'{glob.escape(team_dir)}_*.parquet*'):
+        if stale.fullmatch(path.name):
+            path.unlink(missing_ok=True)
+
+def write_parquet(df, path):
+    """Write a cache file atomically so an interrupted run never leaves a partial file"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    df.to_parquet(tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+def load_and_process_conference_data(team_dirs, interval_files):
+    """Load all teams into one season and one interval frame (with a team column) and process each once"""
+    # File reads are I/O bound and pyarrow releases the GIL, so read teams in parallel
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        team_data = list(executor.map(lambda team_dir: load_team_data(team_dir, interval_files),
+                                      team_dirs))
+    
+    season_df = concat_teams([season for season, _ in team_data], team_dirs)
+    interval_df = concat_teams([interval for _, interval in team_data], team_dirs)
+    
+    return (process_dataframe(season_df) if season_df is not None else None,
+            process_dataframe(interval_df) if interval_df is not None else None)
+
+def concat_teams(frames, team_dirs):
+    """Stack per-team frames (None = no data) and tag rows with a categorical team column"""
+    present = [(i, df) for i, df in enumerate(frames) if df is not None]
+    if not present:
+        return None
+    
+    combined = pd.concat([df for _, df in present], ignore_index=True)
+    # Categorical codes take 1 byte per row instead of a string object per row
+    team_codes = np.repeat([i for i, _ in present], [len(df) for _, df in present])
+    combined['team'] = pd.Categorical.from_codes(team_codes, categories=team_dirs)
+    return combined
+
+def process_dataframe(df):
+    """Common processing for all dataframes"""
+    # Add calculated metrics (numeric types are fixed by read_lineup_csv)
+    # Plain float64 result rather than a masked Float64 from the nullable Int32 column
+    plus_minus = df['PLUS-MINUS'].to_numpy(dtype=np.float64, na_value=np.nan)
+    df['Plus-Minus_per40'] = (plus_minus / df['MP*']) * 40
+    
+    # Create lineup string and flag lineups with a missing player ID
+    df['lineup'], df['has_unk'] = build_height_sorted_lineups(df)
+    
+    return df
+
+def build_height_sorted_lineups(df):
+    """Create a lineup string (players sorted by height ascending) for every row of df
+    
+    Returns the lineup strings and a mask of rows with a missing player ID
+    (the rows whose lineup contains "UNK").
+    """
+    ids = df[PID_COLS].fillna(0).to_numpy(dtype=np.int64)
+    
+    # The same five players show up in the season file and every interval file,
+    # so only build lineups not seen yet (keyed on the sorted player IDs)
+    keys = list(map(tuple, np.sort(ids, axis=1).tolist()))
+    new_keys = [key for key in dict.fromkeys(keys) if key not in LINEUP_CACHE]
+    if new_keys:
+        LINEUP_CACHE.update(zip(new_keys, sort_lineups(np.array(new_keys, dtype=np.int64))))
+    return [LINEUP_CACHE[key] for key in keys], (ids == 0).any(axis=1)
+
+def sort_lineups(ids):
+    """Create lineup strings for an (N, 5) player ID array, sorted by height ascending"""
+    # Gather from the lookup arrays (-1 = not in PLAYER_INFO)
+    idx = lookup_player_index(ids)
+    known = idx >= 0
+    
+    ranks = RANKS_ARR[idx]
+    initials = INITIALS_ARR[idx]
+    unknown = np.nonzero(~known)
+    if len(unknown[0]):
+        for r, c in zip(*unknown):
+            player_id = int(ids[r, c])
+            initials[r, c] = f"P{player_id}" if player_id else "UNK"
+        # Sort unknown players last, ordered by their placeholder
+        _, unknown_order = np.unique(initials[unknown].astype(str), return_inverse=True)
+        ranks[unknown] = len(PLAYER_IDS) + unknown_order
+    
+    # Sort by height then by initial
+    order = np.argsort(ranks, axis=1, kind='stable')
+    sorted_initials = np.take_along_axis(initials, order, axis=1)
+    return ['-'.join(row) for row in sorted_initials]
+
+def round_output_metrics(df):
+    """Copy of df with export metrics rounded; the analysis frames keep full precision"""
+    return df.round(dict.fromkeys(NUMERIC_OUT, 2))
+
+def get_conference_top_lineups(season_df):
+    """Get each team's top lineups by possessions, excluding those with missing players"""
+    # Stable sort keeps file order among equal POSS
+    return (season_df[~season_df['has_unk']]
+            .sort_values(['team', 'POSS'], ascending=[True, False], kind='stable')
+            .groupby('team', sort=False, observed=True)
+            .head(TOP_LINEUPS_COUNT))
+
+# ====================== ANALYSIS FUNCTIONS ======================
+def analyze_team(team_dir, interval_files, progression_metrics=OUTPUT_PROG_METRICS):
+    """Full analysis pipeline for a single team"""
+    return analyze_conference([team_dir], interval_files, progression_metrics)
+
+def analyze_conference(team_dirs, interval_files, progression_metrics=OUTPUT_PROG_METRICS):
+    """Full analysis pipeline for all teams, processed as one batch"""
+    season_df, interval_df = load_and_process_conference_data(team_dirs, interval_files)
+    if season_df is None:
+        return season_df, interval_df  # No team directories, nothing to export
+    
+    # Round copies once for the whole conference rather than per team export
+    top_lineups = round_output_metrics(get_conference_top_lineups(season_df))
+    top_lineups = dict(tuple(top_lineups.groupby('team', sort=False, observed=True)))
+    progression = {}
+    if interval_df is not None:
+        progression = dict(tuple(round_output_metrics(interval_df).groupby('team', sort=False, observed=True)))
+    
+    for team_dir in team_dirs:
+        print(f"\nAnalyzing team: {team_dir}")
+        
+        # Export top lineups
+        export_top_lineups(top_lineups.get(team_dir, season_df.iloc[:0]), team_dir)
+        
+        # Export progression data if available
+        if team_dir in progression:
+            export_progression_data(progression[team_dir], team_dir, progression_metrics)
+    
+    return season_df, interval_df
+
+def write_csv(df, output_file):
+    """Write df to CSV through pyarrow, in the same layout as to_csv(index=False)"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    options = pa_csv.WriteOptions(include_header=False, quoting_style='none')
+    try:
+        with open(output_file, 'wb') as f:
+            # pyarrow always quotes header names, so write the header line ourselves
+            f.write((','.join(df.columns) + '\n').encode())
+            pa_csv.write_csv(table, f, options)
+    except pa.ArrowInvalid:
+        # Unquoted output can't hold a comma, quote or newline (e.g. initials from a
+        # name like 'Ann Smith "Annie"'), so let pandas quote just those values
+        df.to_csv(output_file, index=False)
+
+def export_top_lineups(df, team_name):
+    """Export top lineups for a team (metrics already rounded by round_output_metrics)"""
+    output_df = df[TOP_OUT_COLS].rename(columns=OUTPUT_TOP_METRICS)
+    
+    output_file = f'output/{team_name}_top_lineups.csv'
+    write_csv(output_df, output_file)
+    print(f"Top lineups saved to {output_file}")
+
+def export_progression_data(df, team_name, metrics=OUTPUT_PROG_METRICS):
+    """Export lineup progression data (metrics already rounded by round_output_metrics)"""
+    output_df = df[list(metrics)].rename(columns=metrics)
+    
+    output_file = f'output/{team_name}_progression.csv'
+    write_csv(output_df, output_file)
+    print(f"Progression data saved to {output_file}")